@@ -1,14 +1,51 @@
-from flask import Flask, jsonify, request, render_template, g, redirect, send_from_directory
+from flask import (Flask, Response, jsonify, request, render_template, g, redirect,
+                   send_file, send_from_directory)
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
+import orjson
 import sqlite3
 import os
 import json
-import uuid
-from datetime import datetime
+import hashlib
+import io
+import itertools
+import logging
+import mimetypes
+import queue
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
 
 DATABASE = os.getenv('DATABASE_PATH', os.path.join('data', 'fretlog.db'))
 
-app = Flask(__name__)
+# Ensure the database directory exists once at startup instead of on every connect
+try:
+    os.makedirs(os.path.dirname(DATABASE) or '.', exist_ok=True)
+except OSError as e:
+    print(f"Warning: Could not create database directory: {e}")
+
+class OrjsonProvider(JSONProvider):
+    """JSON provider backed by orjson, which encodes straight to bytes in C"""
+    mimetype = 'application/json'
+    # Like the stdlib encoder, accept int/None dict keys instead of raising
+    option = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=self.option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, option=self.option), mimetype=self.mimetype)
+
+# Static files are served by serve_static_assets below (from memory), not Flask's built-in route
+app = Flask(__name__, static_folder=None)
+app.json = OrjsonProvider(app)
 CORS(app)
 
 # Read version from file
@@ -20,70 +57,443 @@ except Exception as e:
     print(f"Warning: Could not read VERSION file: {e}")
     APP_VERSION = '0.0.0'
 
+# Static assets only change on deploy, so read them once at startup
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+
+def load_static_cache():
+    """Map each file under static/ to (body, mimetype, etag)"""
+    cache = {}
+    for root, _, files in os.walk(STATIC_DIR):
+        for name in files:
+            path = os.path.join(root, name)
+            with open(path, 'rb') as f:
+                body = f.read()
+            rel_path = os.path.relpath(path, STATIC_DIR).replace(os.sep, '/')
+            mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+            cache[rel_path] = (body, mimetype, hashlib.md5(body).hexdigest())
+    return cache
+
+STATIC_CACHE = load_static_cache()
+
+VERSION_JS = f"const APP_VERSION = '{APP_VERSION}';".encode()
+VERSION_JS_ETAG = hashlib.md5(VERSION_JS).hexdigest()
+
+@app.url_defaults
+def add_static_version(endpoint, values):
+    """Append the file's content hash to url_for('static', ...) so the URL changes with the file"""
+    if endpoint == 'static' and not app.debug and 'v' not in values:
+        cached = STATIC_CACHE.get(values.get('filename'))
+        if cached is not None:
+            values['v'] = cached[2]
+
+# ==========================================
+# Connection Pool
+# ==========================================
+# Connections are opened once and reused across requests: a bounded pool of
+# read-only connections plus a single writer guarded by a lock (SQLite allows
+# one writer). Under WAL the readers never wait on the writer.
+WRITE_METHODS = frozenset({'POST', 'PUT', 'PATCH', 'DELETE'})
+
+def connect_db(readonly=False):
+    if readonly:
+        uri = Path(os.path.abspath(DATABASE)).as_uri() + '?mode=ro'
+        db = sqlite3.connect(uri, uri=True, check_same_thread=False, isolation_level=None,
+                             cached_statements=512, factory=DictConnection)
+    else:
+        db = sqlite3.connect(DATABASE, check_same_thread=False, isolation_level=None,
+                             cached_statements=512, factory=DictConnection)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        db.execute('PRAGMA foreign_keys=ON')
+    db.row_factory = dict_factory
+    db.execute('PRAGMA busy_timeout=5000')
+    db.execute('PRAGMA cache_size=-64000')  # 64 MB
+    db.execute('PRAGMA temp_store=MEMORY')
+    db.execute('PRAGMA mmap_size=134217728')  # 128 MB
+    if readonly:
+        db.execute('PRAGMA query_only=1')
+        db.execute('PRAGMA read_uncommitted=0')
+    return db
+
+class PoolExhausted(Exception):
+    """No read connection became free within the pool timeout"""
+
+class ConnectionPool:
+    """Up to `size` lazily opened read-only connections plus one writer"""
+
+    def __init__(self, size, timeout=10):
+        self.size = size
+        self.timeout = timeout
+        self._readers = queue.Queue()
+        self._readers_lock = threading.Lock()
+        self._readers_created = 0
+        self._writer = None
+        self._writer_lock = threading.Lock()
+
+    def acquire(self, write=False):
+        if write:
+            return self._acquire_writer()
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+        with self._readers_lock:
+            if self._readers_created < self.size:
+                db = connect_db(readonly=True)
+                self._readers_created += 1
+                return db
+        try:
+            return self._readers.get(timeout=self.timeout)
+        except queue.Empty:
+            raise PoolExhausted() from None
+
+    def _acquire_writer(self):
+        self._writer_lock.acquire()
+        if self._writer is None:
+            try:
+                self._writer = connect_db()
+            except Exception:
+                self._writer_lock.release()
+                raise
+        return self._writer
+
+    def release(self, db, write=False):
+        if db.in_transaction:
+            db.rollback()
+        if write:
+            self._writer_lock.release()
+        else:
+            self._readers.put(db)
+
+# Every gunicorn thread (4, see Dockerfile) must be able to hold a reader at once,
+# so the pool is never smaller than that regardless of the CPU count
+pool = ConnectionPool(int(os.getenv('DB_READERS', max(os.cpu_count() or 1, 8))))
+
 def get_db():
+    """Return this request's connection: the writer for POST/PUT/PATCH/DELETE, a reader otherwise"""
     db = getattr(g, '_database', None)
     if db is None:
-        # ensure directory exists
-        os.makedirs(os.path.dirname(DATABASE), exist_ok=True)
-        db = g._database = sqlite3.connect(DATABASE)
-        db.row_factory = sqlite3.Row
+        g._database_write = request.method in WRITE_METHODS
+        db = g._database = pool.acquire(write=g._database_write)
     return db
 
+@app.errorhandler(PoolExhausted)
+def pool_exhausted(error):
+    return jsonify({'error': 'Server busy, please retry'}), 503
+
 @app.teardown_appcontext
-def close_connection(exception):
-    db = getattr(g, '_database', None)
+def release_connections(exception):
+    db = g.pop('_database', None)
     if db is not None:
-        db.close()
-
-def dict_from_row(row):
-    return dict(row) if row else None
+        pool.release(db, write=g.pop('_database_write'))
+
+# Column lists for list views; single-row lookups keep SELECT *.
+# created_at is only used for ordering, so it is not sent to the client.
+LIBRARY_LIST_COLUMNS = 'id, name, category_id, artist_id, star_rating, notes'
+SESSION_LIST_COLUMNS = 'id, instrument_id, status, date, start_time, end_time, total_time, notes'
+SESSION_ITEM_FIELDS = ('id', 'session_id', 'library_item_id', 'name', 'category_id', 'time_spent', 'started_at')
+SESSION_ITEM_COLUMNS = ', '.join(SESSION_ITEM_FIELDS)
+
+# Hot-path statements, kept as constants so every call hits the
+# per-connection statement cache with the exact same SQL text
+SQL_GET_CURRENT_SESSION_ID = "SELECT value FROM settings WHERE key='current_session'"
+SQL_GET_CURRENT_SESSION = '''
+    SELECT s.* FROM settings st JOIN sessions s ON s.id = st.value
+    WHERE st.key='current_session'
+'''
+SQL_GET_SESSION_ITEMS = f'SELECT {SESSION_ITEM_COLUMNS} FROM session_items WHERE session_id=?'
+SQL_LIST_LIBRARY = f'SELECT {LIBRARY_LIST_COLUMNS} FROM library_items ORDER BY created_at DESC'
+SQL_GET_LIBRARY_ITEM = 'SELECT * FROM library_items WHERE id=?'
+SQL_DELETE_SESSION_ITEMS = 'DELETE FROM session_items WHERE session_id=?'
+SQL_INSERT_SESSION_ITEM = '''
+    INSERT INTO session_items (id, session_id, library_item_id, name, category_id, time_spent, started_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+SQL_REPLACE_SESSION_ITEM = '''
+    INSERT OR REPLACE INTO session_items (id, session_id, library_item_id, name, category_id, time_spent, started_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Map frontend camelCase to backend snake_case for library item updates
+LIBRARY_FIELD_MAP = {
+    'name': 'name',
+    'categoryId': 'category_id',
+    'artistId': 'artist_id',
+    'starRating': 'star_rating',
+    'notes': 'notes'
+}
+
+# Every UPDATE statement update_library_item can issue, keyed by the frozenset of
+# request keys present, with the keys in parameter order (31 combinations)
+LIBRARY_UPDATE_SQL = {
+    frozenset(combo): (
+        f"UPDATE library_items SET {', '.join(f'{LIBRARY_FIELD_MAP[key]}=?' for key in combo)} WHERE id=?",
+        combo)
+    for combo in itertools.chain.from_iterable(
+        itertools.combinations(LIBRARY_FIELD_MAP, r) for r in range(1, len(LIBRARY_FIELD_MAP) + 1))
+}
+
+class DictCursor(sqlite3.Cursor):
+    """Cursor that keeps the column names of its current result set for dict_factory"""
+    # (description, column names); a cursor hands back the same description
+    # object for every row of a result set and a new one per execute
+    columns = (None, ())
+
+class DictConnection(sqlite3.Connection):
+    """Connection whose cursors, including those behind execute(), are DictCursors"""
+
+    def cursor(self, factory=DictCursor):
+        return super().cursor(factory)
+
+    def execute(self, *args):
+        return self.cursor().execute(*args)
+
+    def executemany(self, *args):
+        return self.cursor().executemany(*args)
+
+def dict_factory(cursor, row):
+    """Row factory that builds plain dicts, ready for jsonify without a per-row copy"""
+    description = cursor.description
+    cached = cursor.columns
+    if cached[0] is not description:
+        cached = cursor.columns = (description, tuple(col[0] for col in description))
+    return dict(zip(cached[1], row))
+
+# RETURNING (SQLite 3.35+) hands back the written row without a second SELECT
+HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+def execute_returning(cursor, query, params, table, row_id):
+    """Run an INSERT/UPDATE and return the written row as a dict"""
+    if HAS_RETURNING:
+        cursor.execute(query + ' RETURNING *', params)
+        # Drain the cursor so the statement completes and autocommits
+        rows = cursor.fetchall()
+        return rows[0] if rows else None
+    cursor.execute(query, params)
+    cursor.execute(f'SELECT * FROM {table} WHERE id=?', (row_id,))
+    return cursor.fetchone()
+
+# Reference data changes rarely but is read on every page load. Each cached
+# value has a version counter bumped after a committed write; it is served
+# only while its version is current. The cache is per process, so it relies on
+# the single gunicorn worker (see Dockerfile).
+REFERENCE_TABLES = {
+    'categories': 'id, name, type, icon, color',
+    'instruments': 'id, name, icon',
+    'artists': 'id, name',
+}
+_ref_cache = {}
+CACHED_SETTINGS = ('theme', 'default_instrument_id')
+_ref_versions = dict.fromkeys([*REFERENCE_TABLES, *CACHED_SETTINGS], 0)
+_ref_cache_lock = threading.Lock()
+
+def get_cached(key, load):
+    """Return the cached value for key, calling load() when it is missing or stale"""
+    with _ref_cache_lock:
+        version = _ref_versions[key]
+        cached = _ref_cache.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    value = load()
+    with _ref_cache_lock:
+        if _ref_versions[key] == version:
+            _ref_cache[key] = (version, value)
+    return value
+
+def get_reference_rows(cursor, table):
+    """Return all rows of a reference table, cached until the next write to it"""
+    def load():
+        cursor.execute(f'SELECT {REFERENCE_TABLES[table]} FROM {table}')
+        return cursor.fetchall()
+    return get_cached(table, load)
+
+def get_cached_setting(cursor, key, default):
+    """Return one of CACHED_SETTINGS, cached until it is next written"""
+    def load():
+        cursor.execute('SELECT value FROM settings WHERE key=?', (key,))
+        row = cursor.fetchone()
+        return row['value'] if row else None
+    value = get_cached(key, load)
+    return default if value is None else value
+
+def invalidate_reference(*keys):
+    """Bump the version of the given cache keys (all of them by default)"""
+    with _ref_cache_lock:
+        for key in keys or list(_ref_versions):
+            _ref_versions[key] += 1
+            _ref_cache.pop(key, None)
+        if not keys:
+            _library_item_cache.clear()
+
+# Library items picked during a practice session are looked up by id over and
+# over; keep the few fields a session item copies. Entries are dropped when the
+# item is edited or deleted, and all of them on import/clear/restore.
+LIBRARY_ITEM_CACHE_SIZE = 256
+_library_item_cache = {}
+
+def get_library_item_ref(cursor, item_id):
+    """Return (id, name, category_id) of a library item, or None if it does not exist"""
+    with _ref_cache_lock:
+        cached = _library_item_cache.get(item_id)
+    if cached is not None:
+        return cached
+    cursor.execute('SELECT id, name, category_id FROM library_items WHERE id=?', (item_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    value = (row['id'], row['name'], row['category_id'])
+    with _ref_cache_lock:
+        if len(_library_item_cache) >= LIBRARY_ITEM_CACHE_SIZE:
+            _library_item_cache.pop(next(iter(_library_item_cache)))
+        _library_item_cache[item_id] = value
+    return value
+
+def invalidate_library_item(item_id):
+    """Drop a library item from the lookup cache after it was changed"""
+    with _ref_cache_lock:
+        _library_item_cache.pop(item_id, None)
 
 def generate_id():
-    return str(uuid.uuid4())
+    """Random 128-bit ID as 32 hex characters"""
+    return os.urandom(16).hex()
+
+def session_item_row(session_id, item):
+    """Normalize a session item sent with camelCase or snake_case keys into a session_items row"""
+    time_spent = item.get('timeSpent')
+    if time_spent is None:
+        time_spent = item.get('time_spent', 0)
+    return (item.get('id') or generate_id(), session_id,
+            item.get('libraryItemId') or item.get('library_item_id'), item.get('name'),
+            item.get('categoryId') or item.get('category_id'), time_spent,
+            item.get('startedAt') or item.get('started_at'))
+
+def resolve_ids_by_name(cursor, table, records):
+    """Yield (id, record) pairs, reusing the id of a row with the same name ignoring case"""
+    cursor.execute(f'SELECT id, name FROM {table}')
+    ids_by_name = {}
+    for row in cursor.fetchall():
+        if row['name'] is not None:
+            ids_by_name.setdefault(row['name'].lower(), row['id'])
+    for record in records:
+        name = record['name']
+        if name is None:
+            yield record['id'], record
+        else:
+            # Earlier records in the same import count as existing rows
+            yield ids_by_name.setdefault(name.lower(), record['id']), record
+
+def get_completed_sessions(cursor):
+    """Load all completed sessions with their items using two queries instead of 1+N"""
+    cursor.execute(f'SELECT {SESSION_LIST_COLUMNS} FROM sessions WHERE status="completed" ORDER BY date DESC')
+    sessions = cursor.fetchall()
+    
+    cursor.execute('''
+        SELECT si.id, si.session_id, si.library_item_id, si.name, si.category_id,
+               si.time_spent, si.started_at
+        FROM session_items si
+        JOIN sessions s ON si.session_id = s.id
+        WHERE s.status="completed"
+        ORDER BY si.rowid
+    ''')
+    items_by_session = defaultdict(list)
+    for row in cursor.fetchall():
+        items_by_session[row['session_id']].append(row)
+    
+    for session in sessions:
+        session['items'] = items_by_session.get(session['id'], [])
+    return sessions
+
+# Bump SCHEMA_VERSION whenever SCHEMA_SQL changes; it is tracked in PRAGMA user_version
+# so a warm boot skips re-running the DDL entirely.
+SCHEMA_VERSION = 3
+
+SCHEMA_SQL = '''
+BEGIN;
+
+DROP TABLE IF EXISTS users;
+
+CREATE TABLE IF NOT EXISTS categories (
+    id TEXT PRIMARY KEY, name TEXT, type TEXT, icon TEXT, color TEXT);
+
+CREATE TABLE IF NOT EXISTS instruments (
+    id TEXT PRIMARY KEY, name TEXT, icon TEXT);
+
+CREATE TABLE IF NOT EXISTS artists (
+    id TEXT PRIMARY KEY, name TEXT COLLATE NOCASE);
+
+CREATE TABLE IF NOT EXISTS library_items (
+    id TEXT PRIMARY KEY, name TEXT, category_id TEXT, artist_id TEXT, 
+    star_rating INTEGER, notes TEXT, created_at TEXT);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY, instrument_id TEXT, status TEXT, date TEXT, 
+    start_time TEXT, end_time TEXT, total_time INTEGER, notes TEXT, created_at TEXT);
+
+CREATE TABLE IF NOT EXISTS session_items (
+    id TEXT PRIMARY KEY, session_id TEXT, library_item_id TEXT, name TEXT, 
+    category_id TEXT, time_spent INTEGER, started_at TEXT);
+
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY, value TEXT);
+
+-- Indexes
+CREATE INDEX IF NOT EXISTS idx_sessions_status_date ON sessions(status, date DESC);
+CREATE INDEX IF NOT EXISTS idx_sessions_status_created ON sessions(status, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_items_session ON session_items(session_id);
+CREATE INDEX IF NOT EXISTS idx_library_category ON library_items(category_id);
+CREATE INDEX IF NOT EXISTS idx_library_artist ON library_items(artist_id);
+CREATE INDEX IF NOT EXISTS idx_library_created ON library_items(created_at DESC);
+
+-- Artist names are unique ignoring case. Older databases may hold case-variant
+-- duplicates, so fold them into one row before the unique index is created.
+UPDATE library_items SET artist_id = (
+    SELECT MIN(keep.id) FROM artists dup
+    JOIN artists keep ON keep.name = dup.name COLLATE NOCASE
+    WHERE dup.id = library_items.artist_id)
+WHERE artist_id IN (SELECT id FROM artists WHERE name IS NOT NULL);
+
+DELETE FROM artists WHERE name IS NOT NULL AND id NOT IN (
+    SELECT MIN(id) FROM artists WHERE name IS NOT NULL GROUP BY name COLLATE NOCASE);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_artists_name_nocase ON artists(name COLLATE NOCASE);
+
+-- Refresh planner statistics for the new indexes
+ANALYZE;
+
+COMMIT;
+'''
 
 def init_db():
-    # ensure directory exists
-    os.makedirs(os.path.dirname(DATABASE), exist_ok=True)
-    
     conn = sqlite3.connect(DATABASE)
     cursor = conn.cursor()
     
-    # Tables
-    cursor.execute('DROP TABLE IF EXISTS users')
-    
-    cursor.execute('''CREATE TABLE IF NOT EXISTS categories (
-        id TEXT PRIMARY KEY, name TEXT, type TEXT, icon TEXT, color TEXT)''')
-    
-    cursor.execute('''CREATE TABLE IF NOT EXISTS instruments (
-        id TEXT PRIMARY KEY, name TEXT, icon TEXT)''')
-    
-    cursor.execute('''CREATE TABLE IF NOT EXISTS artists (
-        id TEXT PRIMARY KEY, name TEXT)''')
-    
-    cursor.execute('''CREATE TABLE IF NOT EXISTS library_items (
-        id TEXT PRIMARY KEY, name TEXT, category_id TEXT, artist_id TEXT, 
-        star_rating INTEGER, notes TEXT, created_at TEXT)''')
-    
-    cursor.execute('''CREATE TABLE IF NOT EXISTS sessions (
-        id TEXT PRIMARY KEY, instrument_id TEXT, status TEXT, date TEXT, 
-        start_time TEXT, end_time TEXT, total_time INTEGER, notes TEXT, created_at TEXT)''')
-    
-    cursor.execute('''CREATE TABLE IF NOT EXISTS session_items (
-        id TEXT PRIMARY KEY, session_id TEXT, library_item_id TEXT, name TEXT, 
-        category_id TEXT, time_spent INTEGER, started_at TEXT)''')
-    
-    cursor.execute('''CREATE TABLE IF NOT EXISTS settings (
-        key TEXT PRIMARY KEY, value TEXT)''')
-    
-    # Default data if empty
-    cursor.execute('SELECT count(*) FROM instruments')
-    if cursor.fetchone()[0] == 0:
-        init_default_data(conn)
+    # WAL is persistent, so set it once up front; an in-memory database has no WAL
+    if DATABASE != ':memory:':
+        cursor.execute('PRAGMA journal_mode=WAL')
+    
+    # Schema (skipped when already current)
+    cursor.execute('PRAGMA user_version')
+    if cursor.fetchone()[0] < SCHEMA_VERSION:
+        conn.executescript(SCHEMA_SQL)
+        cursor.execute(f'PRAGMA user_version={SCHEMA_VERSION}')
+    
+    # Default data on first boot; init_default_data leaves a defaults_seeded marker
+    cursor.execute('''SELECT EXISTS(SELECT 1 FROM settings WHERE key='defaults_seeded'),
+                             EXISTS(SELECT 1 FROM instruments)''')
+    seeded, has_instruments = cursor.fetchone()
+    if not seeded:
+        if has_instruments:
+            # Database was seeded before the marker existed
+            cursor.execute("INSERT INTO settings (key, value) VALUES ('defaults_seeded', '1')")
+        else:
+            init_default_data(conn)
         
     conn.commit()
     conn.close()
+    invalidate_reference()
 
 def init_default_data(conn):
+    """Seed the fixed-ID defaults; safe to re-run, existing rows are left alone"""
     cursor = conn.cursor()
     
     # Default Categories
@@ -94,9 +504,8 @@ def init_default_data(conn):
         ('cat-technique', 'Technique', 'Technique', '💪', '#10b981'),
         ('cat-theory', 'Theory', 'Theory', '📚', '#8b5cf6')
     ]
-    for cat_id, name, type_val, icon, color in cats:
-        cursor.execute('INSERT INTO categories (id, name, type, icon, color) VALUES (?, ?, ?, ?, ?)',
-                       (cat_id, name, type_val, icon, color))
+    cursor.executemany('INSERT OR IGNORE INTO categories (id, name, type, icon, color) VALUES (?, ?, ?, ?, ?)',
+                       cats)
     
     # Default Instruments
     insts = [
@@ -105,14 +514,11 @@ def init_default_data(conn):
         ('inst-guitar', 'Guitar', '🎸'), 
         ('inst-piano', 'Piano', '🎹')
     ]
-    for inst_id, name, icon in insts:
-        cursor.execute('INSERT INTO instruments (id, name, icon) VALUES (?, ?, ?)',
-                       (inst_id, name, icon))
+    cursor.executemany('INSERT OR IGNORE INTO instruments (id, name, icon) VALUES (?, ?, ?)', insts)
     
     # Set default instrument
-    cursor.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('default_instrument_id', ?)", ('inst-guitar',))
-    
-    conn.commit()
+    cursor.execute("INSERT OR IGNORE INTO settings (key, value) VALUES ('default_instrument_id', ?)", ('inst-guitar',))
+    cursor.execute("INSERT OR IGNORE INTO settings (key, value) VALUES ('defaults_seeded', '1')")
 
 @app.context_processor
 def inject_user():
@@ -120,17 +526,10 @@ def inject_user():
         conn = get_db()
         cursor = conn.cursor()
         
-        # Get Current Instrument ID from settings
-        cursor.execute("SELECT value FROM settings WHERE key='default_instrument_id'")
-        row = cursor.fetchone()
-        instrument_id = row[0] if row else 'inst-guitar'
-        
-        # Get Current Instrument
-        instrument = None
-        cursor.execute('SELECT * FROM instruments WHERE id=?', (instrument_id,))
-        inst_row = cursor.fetchone()
-        if inst_row:
-            instrument = dict(inst_row)
+        # Current instrument, resolved from the cached setting and instrument list
+        instrument_id = get_cached_setting(cursor, 'default_instrument_id', 'inst-guitar')
+        instrument = next((inst for inst in get_reference_rows(cursor, 'instruments')
+                           if inst['id'] == instrument_id), None)
         
         # current_user is now a dummy object for template compatibility
         user = {'id': 'local-user', 'name': 'Musician'}
@@ -163,14 +562,36 @@ def statistics():
 def settings():
     return render_template('settings.html', active_page='settings')
 
-@app.route('/static/<path:filename>')
+@app.route('/static/<path:filename>', endpoint='static')
 def serve_static_assets(filename):
-    return send_from_directory('static', filename)
+    return static_response(filename)
+
+def static_response(filename):
+    """Serve a file under static/ from STATIC_CACHE, falling back to disk"""
+    cached = STATIC_CACHE.get(filename)
+    if cached is None or app.debug:
+        return send_from_directory(STATIC_DIR, filename)
+    body, mimetype, etag = cached
+    response = app.response_class(body, mimetype=mimetype)
+    response.set_etag(etag)
+    if request.args.get('v') == etag:
+        # Content-hashed URL from url_for: it never changes, so cache it for good
+        response.cache_control.public = True
+        response.cache_control.max_age = 31536000
+        response.cache_control.immutable = True
+    else:
+        # Unversioned URL (e.g. the service worker's precache list): revalidate via ETag
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
 @app.route('/version.js')
 def serve_version():
     """Serve the application version as a global JS constant"""
-    return f"const APP_VERSION = '{APP_VERSION}';", 200, {'Content-Type': 'application/javascript'}
+    response = app.response_class(VERSION_JS, mimetype='application/javascript')
+    response.set_etag(VERSION_JS_ETAG)
+    # The service worker imports this to detect updates, so it must not go stale
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
 @app.route('/<path:filename>')
 def serve_legacy_html(filename):
@@ -193,48 +614,33 @@ def get_init_data():
     
     # User (Dummy for compatibility)
     user = {'id': 'local-user', 'name': 'Musician'}
-    cursor.execute("SELECT value FROM settings WHERE key='default_instrument_id'")
-    inst_row = cursor.fetchone()
-    user['default_instrument_id'] = inst_row[0] if inst_row else 'inst-guitar'
+    user['default_instrument_id'] = get_cached_setting(cursor, 'default_instrument_id', 'inst-guitar')
     
     # Categories
-    cursor.execute('SELECT * FROM categories')
-    categories = [dict_from_row(row) for row in cursor.fetchall()]
+    categories = get_reference_rows(cursor, 'categories')
     
     # Instruments
-    cursor.execute('SELECT * FROM instruments')
-    instruments = [dict_from_row(row) for row in cursor.fetchall()]
+    instruments = get_reference_rows(cursor, 'instruments')
     
     # Artists
-    cursor.execute('SELECT * FROM artists')
-    artists = [dict_from_row(row) for row in cursor.fetchall()]
+    artists = get_reference_rows(cursor, 'artists')
     
     # Library items
-    cursor.execute('SELECT * FROM library_items ORDER BY created_at DESC')
-    library = [dict_from_row(row) for row in cursor.fetchall()]
+    cursor.execute(SQL_LIST_LIBRARY)
+    library = cursor.fetchall()
     
     # Sessions (completed only)
-    cursor.execute('SELECT * FROM sessions WHERE status="completed" ORDER BY date DESC')
-    sessions = []
-    for row in cursor.fetchall():
-        session = dict_from_row(row)
-        cursor.execute('SELECT * FROM session_items WHERE session_id=?', (session['id'],))
-        session['items'] = [dict_from_row(item) for item in cursor.fetchall()]
-        sessions.append(session)
+    sessions = get_completed_sessions(cursor)
     
     # Current session (running)
-    cursor.execute('SELECT * FROM sessions WHERE status="running" ORDER BY created_at DESC LIMIT 1')
-    current_session_row = cursor.fetchone()
-    current_session = None
-    if current_session_row:
-        current_session = dict_from_row(current_session_row)
-        cursor.execute('SELECT * FROM session_items WHERE session_id=?', (current_session['id'],))
-        current_session['items'] = [dict_from_row(item) for item in cursor.fetchall()]
+    cursor.execute(f'SELECT {SESSION_LIST_COLUMNS} FROM sessions WHERE status="running" ORDER BY created_at DESC LIMIT 1')
+    current_session = cursor.fetchone()
+    if current_session:
+        cursor.execute(SQL_GET_SESSION_ITEMS, (current_session['id'],))
+        current_session['items'] = cursor.fetchall()
     
     # Theme
-    cursor.execute("SELECT value FROM settings WHERE key='theme'")
-    theme_row = cursor.fetchone()
-    theme = theme_row[0] if theme_row else 'dark'
+    theme = get_cached_setting(cursor, 'theme', 'dark')
     
     return jsonify({
         'user': user,
@@ -267,9 +673,7 @@ def update_user():
 def get_categories():
     conn = get_db()
     cursor = conn.cursor()
-    cursor.execute('SELECT * FROM categories')
-    categories = [dict_from_row(row) for row in cursor.fetchall()]
-    conn.close()
+    categories = get_reference_rows(cursor, 'categories')
     return jsonify(categories)
 
 @app.route('/api/categories', methods=['POST'])
@@ -280,23 +684,14 @@ def add_category():
     
     cat_id = data.get('id') or generate_id()
     
-    # Check if exists (for restore/import scenarios)
-    cursor.execute('SELECT * FROM categories WHERE id=?', (cat_id,))
-    if cursor.fetchone():
-         # Update if exists? Or skip? For now let's update or just return existing
-         pass 
-         # We'll just try insert and let it fail or use INSERT OR REPLACE if we wanted
-         # But simpler:
-    
-    # Use INSERT OR REPLACE to handle re-seeding same IDs
-    cursor.execute('''
+    # Use INSERT OR REPLACE to handle re-seeding same IDs (restore/import scenarios)
+    category = execute_returning(cursor, '''
         INSERT OR REPLACE INTO categories (id, name, type, icon, color) VALUES (?, ?, ?, ?, ?)
-    ''', (cat_id, data.get('name'), data.get('type'), data.get('icon', '🎵'), data.get('color')))
+    ''', (cat_id, data.get('name'), data.get('type'), data.get('icon', '🎵'), data.get('color')),
+        'categories', cat_id)
     
     conn.commit()
-    cursor.execute('SELECT * FROM categories WHERE id=?', (cat_id,))
-    category = dict_from_row(cursor.fetchone())
-    conn.close()
+    invalidate_reference('categories')
     return jsonify(category), 201
 
 @app.route('/api/categories/<cat_id>', methods=['PUT'])
@@ -305,14 +700,13 @@ def update_category(cat_id):
     conn = get_db()
     cursor = conn.cursor()
     
-    cursor.execute('''
+    category = execute_returning(cursor, '''
         UPDATE categories SET name=?, type=?, icon=?, color=? WHERE id=?
-    ''', (data.get('name'), data.get('type'), data.get('icon'), data.get('color'), cat_id))
+    ''', (data.get('name'), data.get('type'), data.get('icon'), data.get('color'), cat_id),
+        'categories', cat_id)
     
     conn.commit()
-    cursor.execute('SELECT * FROM categories WHERE id=?', (cat_id,))
-    category = dict_from_row(cursor.fetchone())
-    conn.close()
+    invalidate_reference('categories')
     return jsonify(category)
 
 @app.route('/api/categories/<cat_id>', methods=['DELETE'])
@@ -321,7 +715,7 @@ def delete_category(cat_id):
     cursor = conn.cursor()
     cursor.execute('DELETE FROM categories WHERE id=?', (cat_id,))
     conn.commit()
-    conn.close()
+    invalidate_reference('categories')
     return '', 204
 
 # ==========================================
@@ -331,9 +725,7 @@ def delete_category(cat_id):
 def get_instruments():
     conn = get_db()
     cursor = conn.cursor()
-    cursor.execute('SELECT * FROM instruments')
-    instruments = [dict_from_row(row) for row in cursor.fetchall()]
-    conn.close()
+    instruments = get_reference_rows(cursor, 'instruments')
     return jsonify(instruments)
 
 @app.route('/api/instruments', methods=['POST'])
@@ -344,14 +736,12 @@ def add_instrument():
     
     inst_id = data.get('id') or generate_id()
     
-    cursor.execute('''
+    instrument = execute_returning(cursor, '''
         INSERT OR REPLACE INTO instruments (id, name, icon) VALUES (?, ?, ?)
-    ''', (inst_id, data.get('name'), data.get('icon', '🎸')))
+    ''', (inst_id, data.get('name'), data.get('icon', '🎸')), 'instruments', inst_id)
     
     conn.commit()
-    cursor.execute('SELECT * FROM instruments WHERE id=?', (inst_id,))
-    instrument = dict_from_row(cursor.fetchone())
-    conn.close()
+    invalidate_reference('instruments')
     return jsonify(instrument), 201
 
 @app.route('/api/instruments/<inst_id>', methods=['PUT'])
@@ -360,14 +750,12 @@ def update_instrument(inst_id):
     conn = get_db()
     cursor = conn.cursor()
     
-    cursor.execute('''
+    instrument = execute_returning(cursor, '''
         UPDATE instruments SET name=?, icon=? WHERE id=?
-    ''', (data.get('name'), data.get('icon'), inst_id))
+    ''', (data.get('name'), data.get('icon'), inst_id), 'instruments', inst_id)
     
     conn.commit()
-    cursor.execute('SELECT * FROM instruments WHERE id=?', (inst_id,))
-    instrument = dict_from_row(cursor.fetchone())
-    conn.close()
+    invalidate_reference('instruments')
     return jsonify(instrument)
 
 @app.route('/api/instruments/<inst_id>', methods=['DELETE'])
@@ -376,7 +764,7 @@ def delete_instrument(inst_id):
     cursor = conn.cursor()
     cursor.execute('DELETE FROM instruments WHERE id=?', (inst_id,))
     conn.commit()
-    conn.close()
+    invalidate_reference('instruments')
     return '', 204
 
 # ==========================================
@@ -386,9 +774,7 @@ def delete_instrument(inst_id):
 def get_artists():
     conn = get_db()
     cursor = conn.cursor()
-    cursor.execute('SELECT * FROM artists')
-    artists = [dict_from_row(row) for row in cursor.fetchall()]
-    conn.close()
+    artists = get_reference_rows(cursor, 'artists')
     return jsonify(artists)
 
 @app.route('/api/artists', methods=['POST'])
@@ -397,22 +783,16 @@ def add_artist():
     conn = get_db()
     cursor = conn.cursor()
     
-    # Check if artist exists
-    cursor.execute('SELECT * FROM artists WHERE LOWER(name)=LOWER(?)', (data.get('name'),))
-    existing = cursor.fetchone()
-    
-    if existing:
-        conn.close()
-        return jsonify(dict_from_row(existing))
-    
+    # Insert unless the name is taken (idx_artists_name_nocase); then return the existing artist
     artist_id = generate_id()
-    cursor.execute('INSERT INTO artists (id, name) VALUES (?, ?)', 
-                   (artist_id, data.get('name')))
+    artist = execute_returning(cursor, 'INSERT INTO artists (id, name) VALUES (?, ?) ON CONFLICT DO NOTHING',
+                               (artist_id, data.get('name')), 'artists', artist_id)
+    if artist is None:
+        cursor.execute('SELECT * FROM artists WHERE name = ? COLLATE NOCASE', (data.get('name'),))
+        return jsonify(cursor.fetchone())
     
     conn.commit()
-    cursor.execute('SELECT * FROM artists WHERE id=?', (artist_id,))
-    artist = dict_from_row(cursor.fetchone())
-    conn.close()
+    invalidate_reference('artists')
     return jsonify(artist), 201
 
 @app.route('/api/artists/<artist_id>', methods=['DELETE'])
@@ -421,7 +801,7 @@ def delete_artist(artist_id):
     cursor = conn.cursor()
     cursor.execute('DELETE FROM artists WHERE id=?', (artist_id,))
     conn.commit()
-    conn.close()
+    invalidate_reference('artists')
     return '', 204
 
 @app.route('/api/artists/<artist_id>', methods=['PUT', 'POST'])
@@ -429,11 +809,13 @@ def update_artist(artist_id):
     data = request.json
     conn = get_db()
     cursor = conn.cursor()
-    cursor.execute('UPDATE artists SET name=? WHERE id=?', (data.get('name'), artist_id))
+    try:
+        artist = execute_returning(cursor, 'UPDATE artists SET name=? WHERE id=?',
+                                   (data.get('name'), artist_id), 'artists', artist_id)
+    except sqlite3.IntegrityError:
+        return jsonify({'error': 'An artist with this name already exists.'}), 409
     conn.commit()
-    cursor.execute('SELECT * FROM artists WHERE id=?', (artist_id,))
-    artist = dict_from_row(cursor.fetchone())
-    conn.close()
+    invalidate_reference('artists')
     return jsonify(artist)
 
 # ==========================================
@@ -443,9 +825,8 @@ def update_artist(artist_id):
 def get_library():
     conn = get_db()
     cursor = conn.cursor()
-    cursor.execute('SELECT * FROM library_items ORDER BY created_at DESC')
-    items = [dict_from_row(row) for row in cursor.fetchall()]
-    conn.close()
+    cursor.execute(SQL_LIST_LIBRARY)
+    items = cursor.fetchall()
     return jsonify(items)
 
 @app.route('/api/library', methods=['POST'])
@@ -465,20 +846,17 @@ def add_library_item():
     ''', (name, category_id, artist_id, artist_id))
     
     if cursor.fetchone():
-        conn.close()
         return jsonify({'error': 'An item with this name already exists in this category.'}), 409
 
     item_id = generate_id()
-    cursor.execute('''
+    item = execute_returning(cursor, '''
         INSERT INTO library_items (id, name, category_id, artist_id, star_rating, notes, created_at)
         VALUES (?, ?, ?, ?, ?, ?, ?)
     ''', (item_id, name, category_id, artist_id,
-          data.get('starRating', 0), data.get('notes', ''), datetime.now().isoformat()))
+          data.get('starRating', 0), data.get('notes', ''), datetime.now().isoformat()),
+        'library_items', item_id)
     
     conn.commit()
-    cursor.execute('SELECT * FROM library_items WHERE id=?', (item_id,))
-    item = dict_from_row(cursor.fetchone())
-    conn.close()
     return jsonify(item), 201
 
 @app.route('/api/library/<item_id>', methods=['PUT'])
@@ -492,12 +870,11 @@ def update_library_item(item_id):
         cursor.execute('SELECT name, category_id, artist_id FROM library_items WHERE id=?', (item_id,))
         current = cursor.fetchone()
         if not current:
-            conn.close()
             return jsonify({'error': 'Item not found'}), 404
         
-        new_name = data.get('name', current[0])
-        new_cat = data.get('categoryId', current[1])
-        new_art = data.get('artistId', current[2]) if 'artistId' in data else current[2]
+        new_name = data.get('name', current['name'])
+        new_cat = data.get('categoryId', current['category_id'])
+        new_art = data.get('artistId', current['artist_id']) if 'artistId' in data else current['artist_id']
 
         cursor.execute('''
             SELECT id FROM library_items 
@@ -506,35 +883,18 @@ def update_library_item(item_id):
         ''', (new_name, new_cat, new_art, new_art, item_id))
         
         if cursor.fetchone():
-            conn.close()
             return jsonify({'error': 'An item with this name already exists in this category.'}), 409
     
-    # Map frontend camelCase to backend snake_case
-    field_map = {
-        'name': 'name',
-        'categoryId': 'category_id',
-        'artistId': 'artist_id',
-        'starRating': 'star_rating',
-        'notes': 'notes'
-    }
-    
-    update_fields = []
-    values = []
-    
-    for key, col in field_map.items():
-        if key in data:
-            update_fields.append(f"{col}=?")
-            values.append(data[key])
-    
-    if update_fields:
-        values.append(item_id)
-        query = f"UPDATE library_items SET {', '.join(update_fields)} WHERE id=?"
-        cursor.execute(query, tuple(values))
+    keys = frozenset(key for key in LIBRARY_FIELD_MAP if key in data)
+    if keys:
+        query, combo = LIBRARY_UPDATE_SQL[keys]
+        values = tuple(data[key] for key in combo) + (item_id,)
+        item = execute_returning(cursor, query, values, 'library_items', item_id)
         conn.commit()
-    
-    cursor.execute('SELECT * FROM library_items WHERE id=?', (item_id,))
-    item = dict_from_row(cursor.fetchone())
-    conn.close()
+        invalidate_library_item(item_id)
+    else:
+        cursor.execute(SQL_GET_LIBRARY_ITEM, (item_id,))
+        item = cursor.fetchone()
     return jsonify(item)
 
 @app.route('/api/library/<item_id>', methods=['DELETE'])
@@ -543,7 +903,7 @@ def delete_library_item(item_id):
     cursor = conn.cursor()
     cursor.execute('DELETE FROM library_items WHERE id=?', (item_id,))
     conn.commit()
-    conn.close()
+    invalidate_library_item(item_id)
     return '', 204
 
 # ==========================================
@@ -553,17 +913,8 @@ def delete_library_item(item_id):
 def get_sessions():
     conn = get_db()
     cursor = conn.cursor()
-    cursor.execute('SELECT * FROM sessions WHERE status="completed" ORDER BY date DESC')
-    sessions = []
+    sessions = get_completed_sessions(cursor)
     
-    for row in cursor.fetchall():
-        session = dict_from_row(row)
-        # Get session items
-        cursor.execute('SELECT * FROM session_items WHERE session_id=?', (session['id'],))
-        session['items'] = [dict_from_row(item) for item in cursor.fetchall()]
-        sessions.append(session)
-    
-    conn.close()
     return jsonify(sessions)
 
 @app.route('/api/sessions', methods=['POST'])
@@ -573,72 +924,37 @@ def add_session():
     cursor = conn.cursor()
     
     session_id = data.get('id') or generate_id()
-    
-    # Check if session already exists
-    cursor.execute('SELECT id FROM sessions WHERE id=?', (session_id,))
-    exists = cursor.fetchone()
-    
-    if exists:
-        print(f"DEBUG: Session {session_id} exists. Updating...")
-        # Update existing session
-        cursor.execute('''
-            UPDATE sessions SET instrument_id=?, status=?, date=?, start_time=?, end_time=?, 
-            total_time=?, notes=? WHERE id=?
-        ''', (data.get('instrumentId'), data.get('status', 'completed'),
-              data.get('date', datetime.now().isoformat()), data.get('startTime'),
-              data.get('endTime'), data.get('totalTime', 0), data.get('notes', ''), session_id))
-        
-        # Delete old items and re-insert
-        print(f"DEBUG: Deleting items for session {session_id}")
-        cursor.execute('DELETE FROM session_items WHERE session_id=?', (session_id,))
-        print(f"DEBUG: Deleted {cursor.rowcount} items")
-    else:
-        print(f"DEBUG: Creating new session {session_id}")
-        # Insert new session
-        cursor.execute('''
-            INSERT INTO sessions (id, instrument_id, status, date, start_time, end_time, total_time, notes, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (session_id, data.get('instrumentId'), data.get('status', 'completed'),
-              data.get('date', datetime.now().isoformat()), data.get('startTime'),
-              data.get('endTime'), data.get('totalTime', 0), data.get('notes', ''),
-              datetime.now().isoformat()))
+    now_iso = datetime.now().isoformat()
+    
+    cursor.execute('BEGIN IMMEDIATE')
+    
+    # Create the session, or overwrite it if it already exists (created_at is kept)
+    session = execute_returning(cursor, '''
+        INSERT INTO sessions (id, instrument_id, status, date, start_time, end_time, total_time, notes, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET instrument_id=excluded.instrument_id, status=excluded.status,
+            date=excluded.date, start_time=excluded.start_time, end_time=excluded.end_time,
+            total_time=excluded.total_time, notes=excluded.notes
+    ''', (session_id, data.get('instrumentId'), data.get('status', 'completed'),
+          data.get('date', now_iso), data.get('startTime'),
+          data.get('endTime'), data.get('totalTime', 0), data.get('notes', ''), now_iso),
+        'sessions', session_id)
+    
+    # Delete old items and re-insert
+    cursor.execute(SQL_DELETE_SESSION_ITEMS, (session_id,))
+    logger.debug("Deleted %d items for session %s", cursor.rowcount, session_id)
     
     # Add session items
-    items = data.get('items', [])
-
-    for item in items:
-        item_id = item.get('id') or generate_id()
-        # Handle both camelCase and snake_case keys
-        lib_id = item.get('libraryItemId') or item.get('library_item_id')
-        cat_id = item.get('categoryId') or item.get('category_id')
-        started_at = item.get('startedAt') or item.get('started_at')
-        time_spent = item.get('timeSpent', 0) if item.get('timeSpent') is not None else item.get('time_spent', 0)
-
-        # DEBUG: Check for collision
-        cursor.execute("SELECT session_id FROM session_items WHERE id=?", (item_id,))
-        existing_collision = cursor.fetchone()
-        if existing_collision:
-            print(f"DEBUG: Item {item_id} ALREADY EXISTS in session {existing_collision[0]}")
-            # If it belongs to a different session, this is a logic error in our app
-            # But the UNIQUE constraint will fail regardless.
-            # We must DELETE it by ID to proceed safely, implying session_id mismatch
-            cursor.execute("DELETE FROM session_items WHERE id=?", (item_id,))
-            print(f"DEBUG: Force deleted item {item_id} to resolve collision")
-
-        cursor.execute('''
-            INSERT INTO session_items (id, session_id, library_item_id, name, category_id, time_spent, started_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (item_id, session_id, lib_id, item.get('name'),
-              cat_id, time_spent, started_at))
-    
-    conn.commit()
+    # Items of this session are already gone, so any remaining ID match belongs to
+    # another session; OR REPLACE moves such an item over instead of failing
+    rows = [session_item_row(session_id, item) for item in data.get('items', [])]
+    cursor.executemany(SQL_REPLACE_SESSION_ITEM, rows)
     
-    cursor.execute('SELECT * FROM sessions WHERE id=?', (session_id,))
-    session = dict_from_row(cursor.fetchone())
-    cursor.execute('SELECT * FROM session_items WHERE session_id=?', (session_id,))
-    session['items'] = [dict_from_row(item) for item in cursor.fetchall()]
+    # Read the items back so the response has the stored values, same as GET
+    cursor.execute(SQL_GET_SESSION_ITEMS, (session_id,))
+    session['items'] = cursor.fetchall()
     
-    conn.close()
+    conn.commit()
     return jsonify(session), 201
 
 @app.route('/api/sessions/<session_id>', methods=['PUT'])
@@ -646,50 +962,40 @@ def update_session(session_id):
     data = request.json
     conn = get_db()
     cursor = conn.cursor()
+    cursor.execute('BEGIN IMMEDIATE')
     
     # Update session record
-    cursor.execute('''
+    session = execute_returning(cursor, '''
         UPDATE sessions SET instrument_id=?, status=?, date=?, total_time=?, notes=?, end_time=?
         WHERE id=?
     ''', (data.get('instrumentId'), data.get('status'), data.get('date'),
-          data.get('totalTime'), data.get('notes'), data.get('endTime'), session_id))
+          data.get('totalTime'), data.get('notes'), data.get('endTime'), session_id),
+        'sessions', session_id)
+    if not session:
+        return jsonify({'error': 'Session not found'}), 404
     
     # Delete old items and re-insert new ones
-    cursor.execute('DELETE FROM session_items WHERE session_id=?', (session_id,))
+    cursor.execute(SQL_DELETE_SESSION_ITEMS, (session_id,))
     
     # Add session items
-    items = data.get('items', [])
-    for item in items:
-        item_id = item.get('id') or generate_id()
-        # Handle both camelCase and snake_case keys
-        lib_id = item.get('libraryItemId') or item.get('library_item_id')
-        cat_id = item.get('categoryId') or item.get('category_id')
-        started_at = item.get('startedAt') or item.get('started_at')
-        time_spent = item.get('timeSpent', 0) if item.get('timeSpent') is not None else item.get('time_spent', 0)
-        
-        cursor.execute('''
-            INSERT INTO session_items (id, session_id, library_item_id, name, category_id, time_spent, started_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (item_id, session_id, lib_id, item.get('name'),
-              cat_id, time_spent, started_at))
+    rows = [session_item_row(session_id, item) for item in data.get('items', [])]
+    cursor.executemany(SQL_INSERT_SESSION_ITEM, rows)
     
-    conn.commit()
-    cursor.execute('SELECT * FROM sessions WHERE id=?', (session_id,))
-    session = dict_from_row(cursor.fetchone())
-    cursor.execute('SELECT * FROM session_items WHERE session_id=?', (session_id,))
-    session['items'] = [dict_from_row(item) for item in cursor.fetchall()]
+    # Read the items back so the response has the stored values, same as GET
+    cursor.execute(SQL_GET_SESSION_ITEMS, (session_id,))
+    session['items'] = cursor.fetchall()
     
-    conn.close()
+    conn.commit()
     return jsonify(session)
 
 @app.route('/api/sessions/<session_id>', methods=['DELETE'])
 def delete_session(session_id):
     conn = get_db()
     cursor = conn.cursor()
-    cursor.execute('DELETE FROM session_items WHERE session_id=?', (session_id,))
+    cursor.execute('BEGIN IMMEDIATE')
+    cursor.execute(SQL_DELETE_SESSION_ITEMS, (session_id,))
     cursor.execute('DELETE FROM sessions WHERE id=?', (session_id,))
     conn.commit()
-    conn.close()
     return '', 204
 
 # ==========================================
@@ -700,26 +1006,15 @@ def get_current_session():
     conn = get_db()
     cursor = conn.cursor()
     
-    cursor.execute("SELECT value FROM settings WHERE key='current_session'")
-    result = cursor.fetchone()
-    
-    if not result or not result[0]:
-        conn.close()
-        return jsonify(None)
-    
-    session_id = result[0]
-    cursor.execute('SELECT * FROM sessions WHERE id=?', (session_id,))
+    cursor.execute(SQL_GET_CURRENT_SESSION)
     session = cursor.fetchone()
     
     if not session:
-        conn.close()
         return jsonify(None)
     
-    session = dict_from_row(session)
-    cursor.execute('SELECT * FROM session_items WHERE session_id=?', (session_id,))
-    session['items'] = [dict_from_row(item) for item in cursor.fetchall()]
+    cursor.execute(SQL_GET_SESSION_ITEMS, (session['id'],))
+    session['items'] = cursor.fetchall()
     
-    conn.close()
     return jsonify(session)
 
 @app.route('/api/sessions/current', methods=['POST'])
@@ -730,87 +1025,60 @@ def save_current_session():
     
     session_id = data.get('id') or generate_id()
     
-    # Check if session already exists
-    cursor.execute('SELECT id FROM sessions WHERE id=?', (session_id,))
-    exists = cursor.fetchone()
+    cursor.execute('BEGIN IMMEDIATE')
     
-    if exists:
-        # Update existing session
-        cursor.execute('''
-            UPDATE sessions SET instrument_id=?, status=?, date=?, start_time=?, 
-            total_time=?, notes=? WHERE id=?
-        ''', (data.get('instrumentId'), data.get('status', 'running'),
-              data.get('date'), data.get('startTime'), data.get('totalTime', 0),
-              data.get('notes', ''), session_id))
-        
-        # Delete old items and re-insert
-        cursor.execute('DELETE FROM session_items WHERE session_id=?', (session_id,))
-    else:
-        # Create new session
-        cursor.execute('''
-            INSERT INTO sessions (id, instrument_id, status, date, start_time, total_time, notes, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (session_id, data.get('instrumentId'), data.get('status', 'running'),
-              data.get('date', datetime.now().isoformat()), data.get('startTime'),
-              data.get('totalTime', 0), data.get('notes', ''), datetime.now().isoformat()))
+    # Create or update the session; an update leaves created_at alone
+    now_iso = datetime.now().isoformat()
+    session = execute_returning(cursor, '''
+        INSERT INTO sessions (id, instrument_id, status, date, start_time, total_time, notes, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET instrument_id=excluded.instrument_id, status=excluded.status,
+            date=?, start_time=excluded.start_time, total_time=excluded.total_time, notes=excluded.notes
+    ''', (session_id, data.get('instrumentId'), data.get('status', 'running'),
+          data.get('date', now_iso), data.get('startTime'), data.get('totalTime', 0),
+          data.get('notes', ''), now_iso, data.get('date')), 'sessions', session_id)
+    
+    # Replace the items
+    cursor.execute(SQL_DELETE_SESSION_ITEMS, (session_id,))
     
     # Insert session items
-    items = data.get('items', [])
-
-    for item in items:
-        item_id = item.get('id') or generate_id()
-        # Handle both camelCase and snake_case keys
-        lib_id = item.get('libraryItemId') or item.get('library_item_id')
-        cat_id = item.get('categoryId') or item.get('category_id')
-        started_at = item.get('startedAt') or item.get('started_at')
-        time_spent = item.get('timeSpent', 0) if item.get('timeSpent') is not None else item.get('time_spent', 0)
-
-        cursor.execute('''
-            INSERT INTO session_items (id, session_id, library_item_id, name, category_id, time_spent, started_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (item_id, session_id, lib_id, item.get('name'),
-              cat_id, time_spent, started_at))
+    rows = [session_item_row(session_id, item) for item in data.get('items', [])]
+    cursor.executemany(SQL_INSERT_SESSION_ITEM, rows)
     
     # Store current session reference
     cursor.execute('''
         INSERT OR REPLACE INTO settings (key, value) VALUES ('current_session', ?)
     ''', (session_id,))
     
-    conn.commit()
-    
-    cursor.execute('SELECT * FROM sessions WHERE id=?', (session_id,))
-    session = dict_from_row(cursor.fetchone())
-    cursor.execute('SELECT * FROM session_items WHERE session_id=?', (session_id,))
-    session['items'] = [dict_from_row(item) for item in cursor.fetchall()]
+    # Read the items back so the response has the stored values, same as GET
+    cursor.execute(SQL_GET_SESSION_ITEMS, (session_id,))
+    session['items'] = cursor.fetchall()
     
-    conn.close()
+    conn.commit()
     return jsonify(session)
 
 @app.route('/api/sessions/current', methods=['DELETE'])
 def clear_current_session():
     conn = get_db()
     cursor = conn.cursor()
+    cursor.execute('BEGIN IMMEDIATE')
     
     # Get current session ID
-    cursor.execute("SELECT value FROM settings WHERE key='current_session'")
+    cursor.execute(SQL_GET_CURRENT_SESSION_ID)
     result = cursor.fetchone()
     
-    if result and result[0]:
-        session_id = result[0]
+    if result and result['value']:
+        session_id = result['value']
         
-        # Check status first - only delete if it's still running (cancelling)
+        # Only delete if it's still running (cancelling)
         # If it's already 'completed', it means we successfully saved it, so DON'T delete the data
-        cursor.execute("SELECT status FROM sessions WHERE id=?", (session_id,))
-        row = cursor.fetchone()
-        
-        if row and row[0] == 'running':
-            cursor.execute('DELETE FROM session_items WHERE session_id=?', (session_id,))
-            cursor.execute("DELETE FROM sessions WHERE id=?", (session_id,))
+        cursor.execute("DELETE FROM sessions WHERE id=? AND status='running'", (session_id,))
+        if cursor.rowcount:
+            cursor.execute(SQL_DELETE_SESSION_ITEMS, (session_id,))
     
     # Clear current session reference
     cursor.execute("DELETE FROM settings WHERE key='current_session'")
     conn.commit()
-    conn.close()
     return '', 204
 
 @app.route('/api/sessions/current/items', methods=['POST'])
@@ -819,43 +1087,31 @@ def add_item_to_current_session():
     conn = get_db()
     cursor = conn.cursor()
     
-    # Get current session
-    cursor.execute("SELECT value FROM settings WHERE key='current_session'")
-    result = cursor.fetchone()
+    # Get current session; adding an item leaves the session row itself unchanged
+    cursor.execute(SQL_GET_CURRENT_SESSION)
+    session = cursor.fetchone()
     
-    if not result or not result[0]:
-        conn.close()
+    if not session:
         return jsonify({'error': 'No current session'}), 400
     
-    session_id = result[0]
+    session_id = session['id']
     
     # Get library item info
-    cursor.execute('SELECT * FROM library_items WHERE id=?', (data.get('libraryItemId'),))
-    library_item = cursor.fetchone()
+    library_item = get_library_item_ref(cursor, data.get('libraryItemId'))
     
     if not library_item:
-        conn.close()
         return jsonify({'error': 'Library item not found'}), 404
     
-    library_item = dict_from_row(library_item)
-    
     item_id = generate_id()
-    cursor.execute('''
-        INSERT INTO session_items (id, session_id, library_item_id, name, category_id, time_spent, started_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    ''', (item_id, session_id, library_item['id'], library_item['name'],
-          library_item['category_id'], data.get('timeSpent', 0), 
-          data.get('startedAt') or int(datetime.now().timestamp() * 1000)))
+    cursor.execute(SQL_INSERT_SESSION_ITEM,
+                   (item_id, session_id, *library_item, data.get('timeSpent', 0),
+                    data.get('startedAt') or int(datetime.now().timestamp() * 1000)))
     
     conn.commit()
     
-    # Return updated session
-    cursor.execute('SELECT * FROM sessions WHERE id=?', (session_id,))
-    session = dict_from_row(cursor.fetchone())
-    cursor.execute('SELECT * FROM session_items WHERE session_id=?', (session_id,))
-    session['items'] = [dict_from_row(item) for item in cursor.fetchall()]
+    cursor.execute(SQL_GET_SESSION_ITEMS, (session_id,))
+    session['items'] = cursor.fetchall()
     
-    conn.close()
     return jsonify(session)
 
 @app.route('/api/sessions/current/items/<item_id>', methods=['PUT'])
@@ -864,25 +1120,14 @@ def update_session_item_time(item_id):
     conn = get_db()
     cursor = conn.cursor()
     
-    cursor.execute('UPDATE session_items SET time_spent=? WHERE id=?',
-                   (data.get('timeSpent', 0), item_id))
-    conn.commit()
+    # Return just the updated item; the client already holds the rest of the session
+    item = execute_returning(cursor, 'UPDATE session_items SET time_spent=? WHERE id=?',
+                             (data.get('timeSpent', 0), item_id), 'session_items', item_id)
+    if not item:
+        return jsonify({'error': 'Item not found'}), 404
     
-    # Return updated current session
-    cursor.execute("SELECT value FROM settings WHERE key='current_session'")
-    result = cursor.fetchone()
-    
-    if result and result[0]:
-        session_id = result[0]
-        cursor.execute('SELECT * FROM sessions WHERE id=?', (session_id,))
-        session = dict_from_row(cursor.fetchone())
-        cursor.execute('SELECT * FROM session_items WHERE session_id=?', (session_id,))
-        session['items'] = [dict_from_row(item) for item in cursor.fetchall()]
-        conn.close()
-        return jsonify(session)
-    
-    conn.close()
-    return jsonify(None)
+    conn.commit()
+    return jsonify(item)
 
 # ==========================================
 # Theme API
@@ -891,22 +1136,20 @@ def update_session_item_time(item_id):
 def get_theme():
     conn = get_db()
     cursor = conn.cursor()
-    cursor.execute("SELECT value FROM settings WHERE key='theme'")
-    result = cursor.fetchone()
-    conn.close()
-    return jsonify({'theme': result[0] if result else 'light'})
+    return jsonify({'theme': get_cached_setting(cursor, 'theme', 'light')})
 
 @app.route('/api/theme', methods=['POST'])
 def set_theme():
     data = request.json
     conn = get_db()
     cursor = conn.cursor()
+    theme = data.get('theme', 'light')
     cursor.execute('''
         INSERT OR REPLACE INTO settings (key, value) VALUES ('theme', ?)
-    ''', (data.get('theme', 'light'),))
+    ''', (theme,))
     conn.commit()
-    conn.close()
-    return jsonify({'theme': data.get('theme')})
+    invalidate_reference('theme')
+    return jsonify({'theme': theme})
 
 @app.route('/api/settings', methods=['POST'])
 def update_setting():
@@ -923,7 +1166,8 @@ def update_setting():
         INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)
     ''', (key, value))
     conn.commit()
-    conn.close()
+    if key in CACHED_SETTINGS:
+        invalidate_reference(key)
     
     return jsonify({'status': 'success', 'key': key, 'value': value})
 
@@ -935,58 +1179,63 @@ def get_statistics_summary():
     conn = get_db()
     cursor = conn.cursor()
     
-    now = datetime.now()
-    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
+    midnight = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    today_start = midnight.isoformat()
     
     # Calculate week start (Sunday)
-    days_since_sunday = now.weekday() + 1 if now.weekday() != 6 else 0
-    week_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    from datetime import timedelta
-    week_start = (week_start - timedelta(days=days_since_sunday)).isoformat()
+    days_since_sunday = midnight.weekday() + 1 if midnight.weekday() != 6 else 0
+    week_start = (midnight - timedelta(days=days_since_sunday)).isoformat()
     
-    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0).isoformat()
-    year_start = now.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0).isoformat()
+    month_start = midnight.replace(day=1).isoformat()
+    year_start = midnight.replace(month=1, day=1).isoformat()
     
-    def get_time_in_range(start):
-        cursor.execute('''
-            SELECT COALESCE(SUM(total_time), 0) FROM sessions 
-            WHERE status='completed' AND date >= ?
-        ''', (start,))
-        return cursor.fetchone()[0]
-    
-    cursor.execute('SELECT COALESCE(SUM(total_time), 0) FROM sessions WHERE status="completed"')
-    all_time = cursor.fetchone()[0]
-    
-    summary = {
-        'today': get_time_in_range(today_start),
-        'week': get_time_in_range(week_start),
-        'month': get_time_in_range(month_start),
-        'year': get_time_in_range(year_start),
-        'allTime': all_time
-    }
+    # One pass over completed sessions, bucketed by conditional aggregation
+    cursor.execute('''
+        SELECT COALESCE(SUM(CASE WHEN date >= :today THEN total_time END), 0) AS today,
+               COALESCE(SUM(CASE WHEN date >= :week THEN total_time END), 0) AS week,
+               COALESCE(SUM(CASE WHEN date >= :month THEN total_time END), 0) AS month,
+               COALESCE(SUM(CASE WHEN date >= :year THEN total_time END), 0) AS year,
+               COALESCE(SUM(total_time), 0) AS allTime
+        FROM sessions WHERE status='completed'
+    ''', {'today': today_start, 'week': week_start, 'month': month_start, 'year': year_start})
+    summary = cursor.fetchone()
     
-    conn.close()
     return jsonify(summary)
 
 # = = = = = = = = = = = = = = = = = = = = = =
 # Data Management API
 # = = = = = = = = = = = = = = = = = = = = = =
 
+# Tables holding user data, in export order
+DATA_TABLES = ('categories', 'instruments', 'artists', 'library_items', 'sessions', 'session_items', 'settings')
+
 @app.route('/api/export', methods=['GET'])
 def export_data():
-    """Export all database tables to JSON"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    tables = ['categories', 'instruments', 'artists', 'library_items', 'sessions', 'session_items', 'settings']
-    export = {}
-    
-    for table in tables:
-        cursor.execute(f'SELECT * FROM {table}')
-        export[table] = [dict_from_row(row) for row in cursor.fetchall()]
+    """Export all database tables to JSON, streamed in batches of rows"""
+    tables = DATA_TABLES
+    
+    def generate():
+        # The client sets the pace of the download, so read through a connection
+        # of our own rather than tying up one of the pool's readers meanwhile
+        conn = connect_db(readonly=True)
+        try:
+            cursor = conn.cursor()
+            cursor.arraysize = 1000
+            # One read transaction so every table comes from the same snapshot
+            cursor.execute('BEGIN')
+            for index, table in enumerate(tables):
+                yield (b'{"' if index == 0 else b'],"') + table.encode() + b'":['
+                cursor.execute(f'SELECT * FROM {table}')
+                separator = b''
+                while rows := cursor.fetchmany():
+                    yield separator + b','.join(orjson.dumps(row) for row in rows)
+                    separator = b','
+            yield b']}'
+            cursor.execute('COMMIT')
+        finally:
+            conn.close()
     
-    conn.close()
-    return jsonify(export)
+    return Response(generate(), mimetype='application/json')
 
 @app.route('/api/import', methods=['POST'])
 def import_data():
@@ -999,81 +1248,68 @@ def import_data():
     cursor = conn.cursor()
     
     try:
+        cursor.execute('BEGIN IMMEDIATE')
+        
         # 1. Categories - Dedup by name
         if 'categories' in data:
-            for cat in data['categories']:
-                # Check for existing by name
-                cursor.execute('SELECT id FROM categories WHERE LOWER(name) = LOWER(?)', (cat['name'],))
-                existing = cursor.fetchone()
-                target_id = existing[0] if existing else cat['id']
-                
-                cursor.execute('INSERT OR REPLACE INTO categories (id, name, type, icon, color) VALUES (?, ?, ?, ?, ?)',
-                               (target_id, cat['name'], cat['type'], cat.get('icon', '🎵'), cat.get('color')))
+            cursor.executemany('INSERT OR REPLACE INTO categories (id, name, type, icon, color) VALUES (?, ?, ?, ?, ?)',
+                               [(target_id, cat['name'], cat['type'], cat.get('icon', '🎵'), cat.get('color'))
+                                for target_id, cat in resolve_ids_by_name(cursor, 'categories', data['categories'])])
         
         # 2. Instruments - Dedup by name
         if 'instruments' in data:
-            for inst in data['instruments']:
-                cursor.execute('SELECT id FROM instruments WHERE LOWER(name) = LOWER(?)', (inst['name'],))
-                existing = cursor.fetchone()
-                target_id = existing[0] if existing else inst['id']
-                
-                cursor.execute('INSERT OR REPLACE INTO instruments (id, name, icon) VALUES (?, ?, ?)',
-                               (target_id, inst['name'], inst.get('icon', '🎸')))
+            cursor.executemany('INSERT OR REPLACE INTO instruments (id, name, icon) VALUES (?, ?, ?)',
+                               [(target_id, inst['name'], inst.get('icon', '🎸'))
+                                for target_id, inst in resolve_ids_by_name(cursor, 'instruments', data['instruments'])])
         
-        # 3. Artists
+        # 3. Artists - Dedup by name
         if 'artists' in data:
-            for artist in data['artists']:
-                cursor.execute('SELECT id FROM artists WHERE LOWER(name) = LOWER(?)', (artist['name'],))
-                existing = cursor.fetchone()
-                target_id = existing[0] if existing else artist['id']
-                
-                cursor.execute('INSERT OR REPLACE INTO artists (id, name) VALUES (?, ?)',
-                               (target_id, artist['name']))
+            cursor.executemany('INSERT OR REPLACE INTO artists (id, name) VALUES (?, ?)',
+                               [(target_id, artist['name'])
+                                for target_id, artist in resolve_ids_by_name(cursor, 'artists', data['artists'])])
         
         # 4. Library Items
         if 'library_items' in data:
-            for item in data['library_items']:
-                cursor.execute('''
-                    INSERT OR REPLACE INTO library_items (id, name, category_id, artist_id, star_rating, notes, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (item['id'], item['name'], item.get('category_id'), item.get('artist_id'),
-                      item.get('star_rating', 0), item.get('notes', ''), item.get('created_at')))
+            cursor.executemany('''
+                INSERT OR REPLACE INTO library_items (id, name, category_id, artist_id, star_rating, notes, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', ((item['id'], item['name'], item.get('category_id'), item.get('artist_id'),
+                   item.get('star_rating', 0), item.get('notes', ''), item.get('created_at'))
+                  for item in data['library_items']))
         
         # 5. Sessions
         if 'sessions' in data:
-            for sess in data['sessions']:
-                cursor.execute('''
-                    INSERT OR REPLACE INTO sessions (id, instrument_id, status, date, start_time, end_time, total_time, notes, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (sess['id'], sess.get('instrument_id'), sess.get('status'), sess['date'],
-                      sess.get('start_time'), sess.get('end_time'), sess.get('total_time', 0),
-                      sess.get('notes', ''), sess.get('created_at')))
+            cursor.executemany('''
+                INSERT OR REPLACE INTO sessions (id, instrument_id, status, date, start_time, end_time, total_time, notes, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', ((sess['id'], sess.get('instrument_id'), sess.get('status'), sess['date'],
+                   sess.get('start_time'), sess.get('end_time'), sess.get('total_time', 0),
+                   sess.get('notes', ''), sess.get('created_at'))
+                  for sess in data['sessions']))
         
         # 6. Session Items
         if 'session_items' in data:
-            for item in data['session_items']:
-                cursor.execute('''
-                    INSERT OR REPLACE INTO session_items (id, session_id, library_item_id, name, category_id, time_spent, started_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (item['id'], item['session_id'], item.get('library_item_id'), item['name'],
-                      item.get('category_id'), item.get('time_spent', 0), item.get('started_at')))
+            cursor.executemany('''
+                INSERT OR REPLACE INTO session_items (id, session_id, library_item_id, name, category_id, time_spent, started_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', ((item['id'], item['session_id'], item.get('library_item_id'), item['name'],
+                   item.get('category_id'), item.get('time_spent', 0), item.get('started_at'))
+                  for item in data['session_items']))
         
         # 7. Settings
         if 'settings' in data:
-            for setting in data['settings']:
-                cursor.execute('INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)',
-                               (setting['key'], setting['value']))
+            cursor.executemany('INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)',
+                               ((setting['key'], setting['value']) for setting in data['settings']))
         
         # 8. Table 'users' is no longer imported
         
         conn.commit()
+        invalidate_reference()
         return jsonify({'status': 'success', 'message': 'Data imported successfully'})
     except Exception as e:
         print(f"Error importing data: {e}")
         conn.rollback()
         return jsonify({'error': str(e)}), 500
-    finally:
-        conn.close()
 
 @app.route('/api/clear', methods=['POST'])
 def clear_data():
@@ -1082,56 +1318,112 @@ def clear_data():
     cursor = conn.cursor()
     
     try:
-        # Preserve theme
-        cursor.execute("SELECT value FROM settings WHERE key='theme'")
-        theme_row = cursor.fetchone()
-        preserved_theme = theme_row[0] if theme_row else 'dark'
+        cursor.execute('BEGIN IMMEDIATE')
         
-        # Preserve instrument
-        cursor.execute("SELECT value FROM settings WHERE key='default_instrument_id'")
-        inst_row = cursor.fetchone()
-        preserved_inst = inst_row[0] if inst_row else 'inst-guitar'
+        # Delete everything except the theme and default instrument settings
+        for table in ('session_items', 'sessions', 'library_items', 'artists', 'categories', 'instruments'):
+            cursor.execute(f'DELETE FROM {table}')
+        cursor.execute("DELETE FROM settings WHERE key NOT IN ('theme', 'default_instrument_id')")
         
-        # Delete everything
-        cursor.execute('DELETE FROM session_items')
-        cursor.execute('DELETE FROM sessions')
-        cursor.execute('DELETE FROM library_items')
-        cursor.execute('DELETE FROM artists')
-        cursor.execute('DELETE FROM categories')
-        cursor.execute('DELETE FROM instruments')
-        cursor.execute('DELETE FROM settings')
-        
-        conn.commit()
-        
-        # Re-initialize with defaults
+        # Re-initialize with defaults; the preserved settings are left as they are
         init_default_data(conn)
-        
-        # Restore theme
-        cursor.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('theme', ?)", (preserved_theme,))
-        
-        # Restore instrument
-        cursor.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('default_instrument_id', ?)", (preserved_inst,))
+        cursor.execute("INSERT OR IGNORE INTO settings (key, value) VALUES ('theme', 'dark')")
         
         conn.commit()
+        invalidate_reference()
+        # The bulk delete leaves a large WAL behind; fold it back and truncate it.
+        # Best effort only: with readers open this would otherwise wait out the
+        # busy timeout while holding the writer, and then fail anyway.
+        cursor.execute('PRAGMA busy_timeout=0')
+        try:
+            busy, _, _ = cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchone().values()
+        finally:
+            cursor.execute('PRAGMA busy_timeout=5000')
+        if busy:
+            logger.debug('WAL not truncated after clearing data: readers still active')
         return jsonify({'status': 'success', 'message': 'All data cleared except defaults and profile'})
     except Exception as e:
         conn.rollback()
         return jsonify({'error': str(e)}), 500
+
+@app.route('/api/backup', methods=['GET'])
+def download_backup():
+    """Download the whole database as a SQLite file, copied page by page with the backup API"""
+    conn = get_db()
+    snapshot = sqlite3.connect(':memory:')
+    try:
+        conn.backup(snapshot)
+        body = snapshot.serialize()
+    finally:
+        snapshot.close()
+    
+    return send_file(io.BytesIO(body), mimetype='application/x-sqlite3', as_attachment=True,
+                     download_name=f"fretlog-backup-{datetime.now().strftime('%Y-%m-%d')}.db")
+
+@app.route('/api/backup', methods=['POST'])
+def restore_backup():
+    """Replace the database with an uploaded SQLite backup file"""
+    upload = request.files.get('file')
+    if not upload:
+        return jsonify({'error': 'No file provided'}), 400
+    
+    body = upload.read()
+    if not body.startswith(b'SQLite format 3\x00'):
+        return jsonify({'error': 'Not a SQLite database file'}), 400
+    
+    # A WAL-mode header (file format bytes 18-19 set to 2) cannot be opened in
+    # memory; the snapshot is self-contained, so mark it as a rollback-journal file
+    body = bytearray(body)
+    body[18:20] = b'\x01\x01'
+    
+    source = sqlite3.connect(':memory:')
+    try:
+        source.deserialize(body)
+        if source.execute('PRAGMA integrity_check').fetchone()[0] != 'ok':
+            return jsonify({'error': 'Backup file is corrupt'}), 400
+        
+        # Refuse files that are not FretLog databases before they replace the live data
+        tables = {row[0] for row in source.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        missing = [table for table in DATA_TABLES if table not in tables]
+        if missing:
+            return jsonify({'error': f"Not a FretLog backup (missing tables: {', '.join(missing)})"}), 400
+        if source.execute('PRAGMA user_version').fetchone()[0] > SCHEMA_VERSION:
+            return jsonify({'error': 'Backup was made by a newer version of FretLog'}), 400
+        
+        # A WAL database cannot change its page size, so the backup would fail
+        # with a misleading "readonly database" error
+        conn = get_db()
+        source_page_size = source.execute('PRAGMA page_size').fetchone()[0]
+        page_size = conn.execute('PRAGMA page_size').fetchone()['page_size']
+        if source_page_size != page_size:
+            return jsonify({'error': f'Backup page size ({source_page_size}) does not match '
+                                     f'the database page size ({page_size})'}), 400
+        
+        source.backup(conn)
+    except sqlite3.DatabaseError as e:
+        return jsonify({'error': str(e)}), 400
     finally:
-        conn.close()
+        source.close()
+    
+    # Bring an older backup up to the current schema
+    init_db()
+    return jsonify({'status': 'success', 'message': 'Backup restored successfully'})
 
 @app.route('/manifest.json')
 def serve_manifest():
-    return send_from_directory('static', 'manifest.json')
+    return static_response('manifest.json')
 
 @app.route('/sw.js')
 def serve_sw():
-    return send_from_directory('static', 'sw.js')
+    return static_response('sw.js')
+
+# Migrate/seed the database whenever the app is imported, so `gunicorn server:app`
+# gets the same schema as `python server.py`. init_db skips the DDL once
+# PRAGMA user_version is current, so this is cheap on warm boots.
+with app.app_context():
+    init_db()
 
 if __name__ == '__main__':
-    with app.app_context():
-        init_db()
-    
     # Use environment variables for production flexibility
     debug_mode = os.getenv('FLASK_DEBUG', 'False').lower() in ('true', '1', 't')
     use_reloader = os.getenv('FLASK_USE_RELOADER', str(debug_mode)).lower() in ('true', '1', 't')